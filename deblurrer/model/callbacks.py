@@ -53,9 +53,25 @@ class SaveImageToDisk(tf.keras.callbacks.Callback):
             image (tensor): shape [h, w, 3] dtype float32
             name (str): name for the file
         """
-        # Converts to encodable uint8 type
-        image = (image * 128) + 127
-        image = tf.cast(image, dtype=tf.uint8)
+        file_name = '{path}/{name}.jpg'.format(
+            path=self.folder,
+            name=name,
+        )
+
+        # String tensor avoids retracing for every file name
+        self._save(image, tf.constant(file_name))
+
+    @tf.function
+    def _save(self, image, file_name):
+        """
+        Graph compiled transform, encode and write of the image.
+
+        Args:
+            image (tensor): shape [h, w, 3] dtype float32
+            file_name (tensor): string tensor with the file path
+        """
+        # Converts to encodable uint8 type, clamps out of range values
+        image = tf.saturate_cast(image * 128.0 + 127.0, dtype=tf.uint8)
 
         # Remove batch dimession from the tensor
         image = tf.squeeze(image)
@@ -63,9 +79,4 @@ class SaveImageToDisk(tf.keras.callbacks.Callback):
         # Encodes and write image to disk
         encoded = tf.io.encode_jpeg(image)
 
-        file_name = '{path}/{name}.jpg'.format(
-            path=self.folder,
-            name=name,
-        )
-
         tf.io.write_file(file_name, encoded)
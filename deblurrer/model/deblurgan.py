@@ -11,8 +11,6 @@ like Resnet or Inception
 
 import tensorflow as tf
 from tensorflow.keras import Model
-from tensorflow.python.keras.mixed_precision.experimental import loss_scale_optimizer as lso
-from tensorflow.python.distribute import parameter_server_strategy
 
 from deblurrer.model import FPNGenerator, DoubleScaleDiscriminator
 from deblurrer.model.losses import discriminator_loss, generator_loss
@@ -22,7 +20,7 @@ from deblurrer.model.metrics import discriminator_accuracy
 class DeblurGAN(Model):
     """Define the FPN Generator Arch."""
 
-    def __init__(self, channels=128, filters=12, conv_count=4):
+    def __init__(self, channels=128, filters=12, conv_count=4, image_size=None):
         """
         Init the GAN instance.
 
@@ -30,6 +28,7 @@ class DeblurGAN(Model):
             channels (int): Number of std channels the FPN will manage
             filters (int): Base number of filters, scaled by conv_count
             conv_count (int): Number of leaky conv layers to use
+            image_size (int): Height and width of the train images, None if variable
         """
         super().__init__()
 
@@ -38,6 +37,14 @@ class DeblurGAN(Model):
 
         self.loss_network = self.get_loss_network()
 
+        # Traced once, skips the keras __call__ overhead on every step
+        self.loss_network_fn = tf.function(
+            lambda images: self.loss_network(images, training=False),
+            input_signature=[
+                tf.TensorSpec([None, image_size, image_size, 3], tf.float32),
+            ],
+        )
+
     def call(self, inputs):
         """
         Forward propagates the supplied batch of images.
@@ -152,7 +159,7 @@ class DeblurGAN(Model):
             generated,
             sharp,
             preds,
-            self.loss_network,
+            self.loss_network_fn,
         )
 
         # Register metrics on dictionary
@@ -188,7 +195,6 @@ class DeblurGAN(Model):
         
         # Update **Generator** parameters
         self._minimize(
-            self.distribute_strategy,
             tape,
             self.optimizer[0],
             output[0]['loss'] if return_generated_images else output['loss'],
@@ -242,7 +248,6 @@ class DeblurGAN(Model):
 
         # Update discriminator params for generated images
         self._minimize(
-            self.distribute_strategy,
             tape,
             self.optimizer[1],
             metrics['loss'],
@@ -258,6 +263,8 @@ class DeblurGAN(Model):
         The model will output conv3_3 layer output
         the remaining architecture will be discarded
 
+        The network follows the global mixed precision policy
+
         Returns:
             Loss network based on VGG19
         """
@@ -269,60 +276,19 @@ class DeblurGAN(Model):
             name='loss_network',
         )
 
-    def _minimize(self, strategy, tape, optimizer, loss, trainable_variables):
+    def _minimize(self, tape, optimizer, loss, trainable_variables):
         """
-        This code was taken from Tensorflow source code.
-        this is not exposed trought the public API
-
         Minimizes loss for one step by updating `trainable_variables`.
-        This is roughly equivalent to
-        ```python
-        gradients = tape.gradient(loss, trainable_variables)
-        self.optimizer.apply_gradients(zip(gradients, trainable_variables))
-        ```
-        However, this function also applies gradient clipping and loss scaling if the
-        optimizer is a LossScaleOptimizer.
+
+        Optimizer.minimize applies gradient clipping, and loss scaling
+        if the optimizer is a LossScaleOptimizer.
+
         Args:
-            strategy: `tf.distribute.Strategy`.
             tape: A gradient tape. The loss must have been computed under this tape.
             optimizer: The optimizer used to minimize the loss.
             loss: The loss tensor.
             trainable_variables: The variables that will be updated in order to minimize
             the loss.
         """
-
-        with tape:
-            if isinstance(optimizer, lso.LossScaleOptimizer):
-                loss = optimizer.get_scaled_loss(loss)
-
-        gradients = tape.gradient(loss, trainable_variables)
-
-        # Whether to aggregate gradients outside of optimizer. This requires support
-        # of the optimizer and doesn't work with ParameterServerStrategy and
-        # CentralStroageStrategy.
-        aggregate_grads_outside_optimizer = (
-            optimizer._HAS_AGGREGATE_GRAD and not isinstance(
-                strategy.extended,
-                parameter_server_strategy.ParameterServerStrategyExtended,
-            ),
-        )
-
-        if aggregate_grads_outside_optimizer:
-            # We aggregate gradients before unscaling them, in case a subclass of
-            # LossScaleOptimizer all-reduces in fp16. All-reducing in fp16 can only be
-            # done on scaled gradients, not unscaled gradients, for numeric stability.
-            gradients = optimizer._aggregate_gradients(zip(gradients, trainable_variables))
-
-        if isinstance(optimizer, lso.LossScaleOptimizer):
-            gradients = optimizer.get_unscaled_gradients(gradients)
-
-        gradients = optimizer._clip_gradients(gradients)
-
         if trainable_variables:
-            if aggregate_grads_outside_optimizer:
-                optimizer.apply_gradients(
-                    zip(gradients, trainable_variables),
-                    experimental_aggregate_gradients=False,
-                )
-            else:
-                optimizer.apply_gradients(zip(gradients, trainable_variables))
+            optimizer.minimize(loss, trainable_variables, tape=tape)
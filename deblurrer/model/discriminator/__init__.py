@@ -11,4 +11,4 @@ Other a Global Image Discriminator
 
 from deblurrer.model.discriminator.local import LocalDiscriminator, LeakyConvBlock
 from deblurrer.model.discriminator.dglobal import GlobalDiscriminator
-from deblurrer.model.discriminator.discriminator import DoubleScaleDiscriminator
+from deblurrer.model.discriminator.discriminator import DoubleScaleDiscriminator, DiscPred
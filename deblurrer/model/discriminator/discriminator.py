@@ -9,11 +9,16 @@ parallel, check patch of the imput image and average its probs
 of being real or generated
 """
 
+from collections import namedtuple
+
 import tensorflow as tf
 from tensorflow.keras import layers, Model
 
 from deblurrer.model.discriminator import LocalDiscriminator, GlobalDiscriminator
 
+# Output of the DoubleScaleDiscriminator, tensors shape [batch, 1]
+DiscPred = namedtuple('DiscPred', ['local', 'global_'])
+
 
 class DoubleScaleDiscriminator(Model):
     """
@@ -47,7 +52,7 @@ class DoubleScaleDiscriminator(Model):
             inputs (list): two tensors shape [batch, height, width, chnls]
 
         Returns:
-            Dict with local/global keys w/ tensors shape [batch, 1]
+            DiscPred with local/global_ tensors shape [batch, 1]
         """
         # Concat inputs in channels-wise
         concat_inputs = tf.concat([inputs[1], inputs[0]], axis=-1)
@@ -55,7 +60,4 @@ class DoubleScaleDiscriminator(Model):
         local = self.local(concat_inputs)
         dglobal = self.dglobal(inputs[1])
 
-        return {
-            'local': local,
-            'global': dglobal,
-        }
+        return DiscPred(local=local, global_=dglobal)
@@ -6,6 +6,14 @@
 import tensorflow as tf
 
 
+@tf.function(
+    jit_compile=True,
+    reduce_retracing=True,
+    input_signature=[
+        tf.TensorSpec(shape=None, dtype=tf.float32),
+        tf.TensorSpec(shape=[], dtype=tf.bool),
+    ],
+)
 def ragan_ls_loss(preds, real_preds):
     """
     Compute the RaGAN-LS loss of supplied prediction.
@@ -20,7 +28,7 @@ def ragan_ls_loss(preds, real_preds):
     Returns:
         Loss of predictions compared to expectation
     """
-    real_preds = tf.constant(real_preds, dtype=preds.dtype)
+    real_preds = tf.cast(real_preds, dtype=preds.dtype)
 
     # This factor allows soft/smooth labels
     # We use one sided soft labels due the ragan loss design
@@ -32,10 +40,10 @@ def ragan_ls_loss(preds, real_preds):
         dtype=preds.dtype,
     )
 
-    first_side = tf.multiply(real_preds * soft_factor, tf.square(preds - 1))
-    second_side = tf.multiply((1 - real_preds) * soft_factor, tf.square(preds + 1))
+    # Only one side of the loss is active, the target is 1 or -1
+    target = real_preds * 2.0 - 1.0
 
-    return tf.reduce_mean(first_side + second_side)
+    return tf.reduce_mean(soft_factor * tf.square(preds - target))
 
 
 def discriminator_loss(preds, real_preds):
@@ -43,16 +51,21 @@ def discriminator_loss(preds, real_preds):
     Compute the **TOTAL** RaGAN-LS loss of DScaleDiscrim.
 
     Args:
-        preds (dict): discriminator output over real images
+        preds (DiscPred): discriminator output over real images
         real_preds (bool): if supplied preds comes from real images
 
     Returns:
         Total loss over real and fake images
     """
-    loss_l = ragan_ls_loss(preds['local'], real_preds)
-    loss_g = ragan_ls_loss(preds['global'], real_preds)
+    # Both outputs are shape [batch, 1], the mean over the concat
+    # equals the average of the local and global losses
+    preds = tf.concat(
+        [tf.reshape(preds.local, [-1]), tf.reshape(preds.global_, [-1])],
+        axis=0,
+    )
 
-    return (loss_l + loss_g) / 2.0
+    # Losses are computed in float32 even under mixed precision
+    return ragan_ls_loss(tf.cast(preds, tf.float32), real_preds)
 
 
 def generator_loss(gen_images, sharp_images, fake_pred, loss_network):
@@ -70,22 +83,27 @@ def generator_loss(gen_images, sharp_images, fake_pred, loss_network):
     Args:
         gen_images (tf.Tensor): Batch of images generated by the FPN
         sharp_images (tf.Tensor): Batch of ground truth sharp images
-        fake_pred (tf.Tensor): Scalar, output of the discriminator
-        loss_network (Model): Model network for perceptual loss/FRL
+        fake_pred (DiscPred): output of the discriminator
+        loss_network (Model): Model network or inference fn for perceptual loss/FRL
 
     Returns:
         Generator three-term loss function output
     """
-    lp = tf.keras.losses.mean_squared_error(sharp_images, gen_images)
+    # Generated images may be float16, all the terms are float32
+    lp = tf.keras.losses.mean_squared_error(
+        tf.cast(sharp_images, tf.float32),
+        tf.cast(gen_images, tf.float32),
+    )
     lp = tf.reduce_mean(lp)
 
     lx = feature_reconstruction_loss(gen_images, sharp_images, loss_network)
 
     ladv = discriminator_loss(fake_pred, real_preds=True)
 
-    return 0.5 * lp + 0.006 * lx + 0.01 * ladv
+    return 0.5 * lp + 0.006 * tf.cast(lx, tf.float32) + 0.01 * ladv
 
 
+@tf.function(jit_compile=True, reduce_retracing=True)
 def feature_reconstruction_loss(gen_images, sharp_images, loss_network):
     """
     Compute FRL between gen image and sharp image.
@@ -93,23 +111,31 @@ def feature_reconstruction_loss(gen_images, sharp_images, loss_network):
     Args:
         gen_images (tf.Tensor): Batch of images generated by the FPN
         sharp_images (tf.Tensor): Batch of ground truth sharp images
-        loss_network (Model): Model network for perceptual loss/FRL
+        loss_network (Model): Model network or inference fn for perceptual loss/FRL
 
     Returns:
         FR loss between generated ans sharp images
     """
-    gen_output = loss_network(gen_images, training=False)
-    sharp_output = loss_network(sharp_images, training=False)
-
-    loss = gen_output - sharp_output
-    loss = tf.square(loss)
-    loss = tf.divide(
-        loss,
-        tf.cast(
-            tf.math.reduce_prod(tf.shape(gen_output)[1:]),
-            dtype=loss.dtype,
-        ),
+    # Single forward pass over generated and sharp images
+    images = tf.concat(
+        [tf.cast(gen_images, dtype=sharp_images.dtype), sharp_images],
+        axis=0,
     )
-    loss = tf.reduce_mean(loss)
 
-    return loss
+    # Precompiled inference fns already run with training=False
+    if (isinstance(loss_network, tf.keras.Model)):
+        outputs = loss_network(images, training=False)
+    else:
+        outputs = loss_network(images)
+    gen_output, sharp_output = tf.split(outputs, 2, axis=0)
+
+    # Features may be float16, square and reduce on float32 for stability
+    loss = tf.cast(gen_output - sharp_output, dtype=tf.float32)
+    loss = tf.reduce_mean(tf.square(loss))
+
+    # Feature map size, a python constant when the shape is static
+    norm = gen_output.shape[1:].num_elements()
+    if (norm is None):
+        norm = tf.cast(tf.reduce_prod(tf.shape(gen_output)[1:]), dtype=loss.dtype)
+
+    return loss / norm
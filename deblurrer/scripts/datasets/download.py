@@ -18,9 +18,15 @@ defines the download and extraction logic of each data split.
 """
 
 import os
+import shutil
+import tempfile
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+from stream_unzip import stream_unzip
 from tqdm import tqdm
 
 
@@ -50,38 +56,112 @@ def create_folder():
     return folder_path
 
 
-def download(source_url, download_path):
+def download_range(source_url, download_path, start, end, progress):
+    """
+    Download the byte range [start, end] of source_url into download_path.
+
+    Args:
+        source_url (str): URL from where pull the file
+        download_path (str): Local preallocated file to write the range into
+        start (int): First byte of the range
+        end (int): Last byte of the range, inclusive
+        progress (fn): Called with the size of every written block
+
+    Raises:
+        requests.HTTPError: if the request fails or the range is ignored
+
+    """
+    resp = requests.get(
+        source_url,
+        headers={'Range': 'bytes={start}-{end}'.format(start=start, end=end)},
+        stream=True,
+    )
+    resp.raise_for_status()
+
+    # Server ignored the range, writing the full body would corrupt the file
+    if (resp.status_code != 206):
+        raise requests.HTTPError(
+            'Expected partial content, got status {status}'.format(status=resp.status_code),
+            response=resp,
+        )
+
+    with open(download_path, 'r+b') as stream_file:
+        stream_file.seek(start)
+
+        for block in resp.iter_content(1024 * 1024):
+            stream_file.write(block)
+            progress(len(block))
+
+
+def download(source_url, download_path, parts=8):
     """
     Download the file at source_url and stores it at download_path.
 
+    If the server supports ranges, the file is fetched in parallel parts
+
     Args:
         source_url (str): URL from where pull the file
         download_path (str): Local path for store the downloaded file
+        parts (int): Number of concurrent range requests
 
     Returns:
         True if file was downloaded, False otherwise
 
     """
     if (not (os.path.exists(download_path) and os.path.isfile(download_path))):
-        resp = requests.get(source_url, stream=True)
+        head = requests.head(source_url, allow_redirects=True)
 
-        total_size = int(resp.headers.get('content-length', 0))
-        block_size = 16384
+        total_size = int(head.headers.get('content-length', 0))
+        accept_ranges = head.headers.get('accept-ranges', 'none')
         progress_bar = tqdm(total=total_size, unit='iB', unit_scale=True)
 
-        with open(download_path, 'wb') as stream_file:
-            for block in resp.iter_content(block_size):
-                progress_bar.update(len(block))
-                stream_file.write(block)
-
+        # A partial file would be taken as already downloaded by later calls
+        try:
+            if (total_size > 0 and accept_ranges == 'bytes'):
+                # Preallocate the file, every part writes at its own offset
+                with open(download_path, 'wb') as stream_file:
+                    stream_file.truncate(total_size)
+
+                # Progress bar is shared between the worker threads
+                lock = threading.Lock()
+
+                def progress(size):
+                    with lock:
+                        progress_bar.update(size)
+
+                part_size = -(-total_size // parts)
+                ranges = [
+                    (start, min(start + part_size, total_size) - 1)
+                    for start in range(0, total_size, part_size)
+                ]
+
+                with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                    list(executor.map(
+                        lambda part: download_range(source_url, download_path, *part, progress),
+                        ranges,
+                    ))
+            else:
+                resp = requests.get(source_url, stream=True)
+                resp.raise_for_status()
+
+                with open(download_path, 'wb') as stream_file:
+                    for block in resp.iter_content(1024 * 1024):
+                        progress_bar.update(len(block))
+                        stream_file.write(block)
+        except Exception:
             progress_bar.close()
-            stream_file.close()
+            if (os.path.exists(download_path)):
+                os.remove(download_path)
+            raise
 
-            if (total_size != 0 and progress_bar.n != total_size):
-                print(total_size, progress_bar.n)
-                return False
+        progress_bar.close()
 
-            return True
+        if (total_size != 0 and progress_bar.n != total_size):
+            print(total_size, progress_bar.n)
+            os.remove(download_path)
+            return False
+
+        return True
 
     return False
 
@@ -99,32 +179,179 @@ def extract(file_path, extract_path):
 
     """
     if (os.path.exists(file_path) and os.path.isfile(file_path)):
+        extract_path = os.path.abspath(extract_path)
+
         with zipfile.ZipFile(file_path, 'r') as compressed:
-            compressed.extractall(extract_path)
-            compressed.close()
+            members = []
+
+            for member in compressed.infolist():
+                member_path = os.path.abspath(
+                    os.path.join(extract_path, member.filename),
+                )
 
-            return True
+                # Skip absolute or parent relative members, same as download_and_extract
+                if (not member_path.startswith(extract_path + os.sep)):
+                    continue
+
+                # Create folders upfront, avoids makedirs races between workers
+                if (member.is_dir()):
+                    os.makedirs(member_path, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(member_path), exist_ok=True)
+                    members.append(member)
+
+        # zlib releases the GIL, members are decompressed in parallel
+        # ZipFile handles are not thread safe, every worker opens its own
+        def extract_members(worker_members):
+            with zipfile.ZipFile(file_path, 'r') as worker_compressed:
+                for member in worker_members:
+                    worker_compressed.extract(member, extract_path)
+
+        workers = os.cpu_count() or 1
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(
+                extract_members,
+                [members[index::workers] for index in range(workers)],
+            ))
+
+        return True
 
     return False
 
 
+def stream_extract(source_url, extract_path):
+    """
+    Download the zip at source_url and extract it while it downloads.
+
+    The zip is never written to disk, extraction overlaps the transfer
+    Members are staged on a temporary folder and only moved to
+    extract_path once the whole transfer succeeded
+
+    Args:
+        source_url (str): URL from where pull the zip file
+        extract_path (str): Path to copy the extracted files
+
+    Returns:
+        True if downloaded and extracted successfully, False otherwise
+
+    """
+    resp = requests.get(source_url, stream=True)
+    if (not resp.ok):
+        return False
+
+    total_size = int(resp.headers.get('content-length', 0))
+    progress_bar = tqdm(total=total_size, unit='iB', unit_scale=True)
+
+    def blocks():
+        for block in resp.iter_content(1024 * 1024):
+            progress_bar.update(len(block))
+            yield block
+
+    extract_path = os.path.abspath(extract_path)
+    staging_path = tempfile.mkdtemp(dir=extract_path)
+
+    try:
+        for member_name, _, member_chunks in stream_unzip(blocks()):
+            # Names without the zip utf-8 flag are cp437, same as zipfile
+            try:
+                member_name = member_name.decode('utf-8')
+            except UnicodeDecodeError:
+                member_name = member_name.decode('cp437')
+
+            member_path = os.path.abspath(
+                os.path.join(staging_path, member_name),
+            )
+
+            # Skip members pointing outside extract_path, chunks must be consumed
+            if (not member_path.startswith(staging_path + os.sep)):
+                for _ in member_chunks:
+                    pass
+                continue
+
+            # Directory entries
+            if (member_name.endswith('/')):
+                os.makedirs(member_path, exist_ok=True)
+                for _ in member_chunks:
+                    pass
+                continue
+
+            os.makedirs(os.path.dirname(member_path), exist_ok=True)
+            with open(member_path, 'wb') as member_file:
+                for chunk in member_chunks:
+                    member_file.write(chunk)
+
+        progress_bar.close()
+
+        if (total_size != 0 and progress_bar.n != total_size):
+            print(total_size, progress_bar.n)
+            return False
+
+        # Transfer completed, move the staged members into place
+        for dir_path, _, file_names in os.walk(staging_path):
+            dest_path = os.path.join(
+                extract_path,
+                os.path.relpath(dir_path, staging_path),
+            )
+            os.makedirs(dest_path, exist_ok=True)
+
+            for file_name in file_names:
+                os.replace(
+                    os.path.join(dir_path, file_name),
+                    os.path.join(dest_path, file_name),
+                )
+
+        return True
+    finally:
+        progress_bar.close()
+        shutil.rmtree(staging_path)
+
+
+def download_and_extract(source_url, extract_path):
+    """
+    Download the zip at source_url and extract it to extract_path.
+
+    If the server supports ranges, the zip is fetched with parallel
+    range requests and extracted by parallel workers
+    otherwise it is extracted while it downloads
+
+    Args:
+        source_url (str): URL from where pull the zip file
+        extract_path (str): Path to copy the extracted files
+
+    Returns:
+        True if downloaded and extracted successfully, False otherwise
+
+    """
+    head = requests.head(source_url, allow_redirects=True)
+
+    total_size = int(head.headers.get('content-length', 0))
+    accept_ranges = head.headers.get('accept-ranges', 'none')
+
+    # A single stream gains nothing from landing on disk first
+    if (not (total_size > 0 and accept_ranges == 'bytes')):
+        return stream_extract(source_url, extract_path)
+
+    download_folder = tempfile.mkdtemp(dir=extract_path)
+    download_path = os.path.join(download_folder, 'download.zip')
+
+    try:
+        return download(source_url, download_path) and extract(download_path, extract_path)
+    finally:
+        shutil.rmtree(download_folder)
+
+
 def execute():
     folder_path = create_folder()
 
-    # Download link and download path
+    # Download link
     source_url = 'downlaod'
-    download_path = os.path.join(folder_path, 'blur.zip')
-
-    # download blur-dataset
-    downloaded = download(source_url, download_path)
-    if (not downloaded):
-        print('Error on download or file already downloaded')
-
-    if (downloaded):
-        # Extract blur-dataset
-        print('Extracting files')
-        if (not extract(download_path, folder_path)):
-            print('Download path does not exists')
+
+    # Download and extract blur-dataset
+    print('Downloading and extracting files')
+    if (not download_and_extract(source_url, folder_path)):
+        print('Error on download or extraction')
+    else:
         print('Extraction succesful')
 
 
@@ -18,39 +18,134 @@ import tensorflow as tf
 
 AUTOTUNE = tf.data.experimental.AUTOTUNE
 
+FEATURE_PROPERTIES = {
+    'sharp': tf.io.FixedLenFeature([], tf.string),
+    'blur': tf.io.FixedLenFeature([], tf.string),
+}
 
-def parse(example):
+
+def parse(example, crop_size, ratio=1):
     """
-    Parse single example from tfrecord to actual image.
+    Parse a batch of examples from tfrecord to actual images.
 
-    this fn operates over a single sharp/blur pair
-    if you know how to vectorize this, colaborate
+    This fn is vectorized, parse_example runs once over the whole batch
+    Only a random crop window of every pair is decoded
 
     Args:
-        example (tf.Tensor): sharp/blur tfrecord encoded strings
+        example (tf.Tensor): batch of sharp/blur tfrecord encoded strings
+        crop_size (int): height and width of the cropped images
+        ratio (int): jpeg downscale factor applied while decoding, 1, 2, 4 or 8
 
     Returns:
-        fully parsed, decoded and loaded sharp/blur pair(Rank 4)
+        batch of parsed, cropped and decoded sharp/blur pairs(Rank 5)
 
     """
-    feature_properties = {
-        'sharp': tf.io.FixedLenFeature([], tf.string),
-        'blur': tf.io.FixedLenFeature([], tf.string),
-    }
+    example = tf.io.parse_example(example, FEATURE_PROPERTIES)
+
+    # One stateful draw per batch, the per pair sampling is stateless
+    seed = tf.random.uniform([2], maxval=tf.int32.max, dtype=tf.int32)
+    seeds = tf.random.experimental.stateless_split(seed, num=tf.shape(example['sharp'])[0])
 
-    example = tf.io.parse_example(example, feature_properties)
+    # The tfrecords only store jpeg encoded images
+    def crop_window(inputs):
+        image, seed = inputs
 
-    # Decode sharp
-    sharp = tf.io.decode_image(example['sharp'], expand_animations=False)
+        # Crop window is relative to the downscaled image
+        shape = tf.io.extract_jpeg_shape(image)
+        shape = (shape + ratio - 1) // ratio
+        limit = tf.cast(shape[:2] - crop_size + 1, dtype=tf.float32)
+        offset = tf.random.stateless_uniform([2], seed=seed) * limit
 
-    # Decode blur
-    blur = tf.io.decode_image(example['blur'], expand_animations=False)
+        return tf.concat([tf.cast(offset, tf.int32), [crop_size, crop_size]], axis=0)
 
-    example = tf.stack([sharp, blur])
+    # Sharp and blur share size, windows are sampled from sharp headers
+    windows = tf.map_fn(
+        crop_window,
+        (example['sharp'], seeds),
+        fn_output_signature=tf.TensorSpec([4], tf.int32),
+    )
+
+    # Flatten pairs as [sharp_0, blur_0, sharp_1, ...], pairs share window
+    images = tf.reshape(tf.stack([example['sharp'], example['blur']], axis=1), [-1])
+    windows = tf.repeat(windows, 2, axis=0)
+
+    images = tf.map_fn(
+        lambda inputs: tf.io.decode_and_crop_jpeg(
+            inputs[0],
+            inputs[1],
+            channels=3,
+            ratio=ratio,
+        ),
+        (images, windows),
+        fn_output_signature=tf.TensorSpec([crop_size, crop_size, 3], tf.uint8),
+    )
+
+    # Reshape is a view, decoded images are not moved again
+    example = tf.reshape(images, [-1, 2, crop_size, crop_size, 3])
 
     return example
 
 
+def decode(example, ratio=1):
+    """
+    Parse and fully decode a batch of examples from tfrecord.
+
+    Used when the decoded images are cached, crops are applied later
+    All the images of a batch must share size
+
+    Args:
+        example (tf.Tensor): batch of sharp/blur tfrecord encoded strings
+        ratio (int): jpeg downscale factor applied while decoding, 1, 2, 4 or 8
+
+    Returns:
+        batch of parsed and decoded sharp/blur pairs(Rank 5)
+
+    """
+    example = tf.io.parse_example(example, FEATURE_PROPERTIES)
+
+    # Flatten pairs as [sharp_0, blur_0, sharp_1, ...]
+    images = tf.reshape(tf.stack([example['sharp'], example['blur']], axis=1), [-1])
+
+    images = tf.map_fn(
+        lambda image: tf.io.decode_jpeg(image, channels=3, ratio=ratio),
+        images,
+        fn_output_signature=tf.TensorSpec([None, None, 3], tf.uint8),
+    )
+
+    shape = tf.shape(images)
+
+    return tf.reshape(images, [-1, 2, shape[1], shape[2], 3])
+
+
+def crop(example, crop_size):
+    """
+    Random crop a batch of decoded sharp/blur pairs.
+
+    Sharp and blur of every pair share the crop window
+
+    Args:
+        example (tf.Tensor): batch of sharp/blur pairs, shape [batch, 2, h, w, 3]
+        crop_size (int): height and width of the cropped images
+
+    Returns:
+        batch of cropped sharp/blur pairs(Rank 5)
+
+    """
+    # One stateful draw per batch, the per pair sampling is stateless
+    seed = tf.random.uniform([2], maxval=tf.int32.max, dtype=tf.int32)
+    seeds = tf.random.experimental.stateless_split(seed, num=tf.shape(example)[0])
+
+    return tf.map_fn(
+        lambda inputs: tf.image.stateless_random_crop(
+            inputs[0],
+            size=[2, crop_size, crop_size, 3],
+            seed=inputs[1],
+        ),
+        (example, seeds),
+        fn_output_signature=tf.TensorSpec([2, crop_size, crop_size, 3], tf.uint8),
+    )
+
+
 def transform(example):
     """
     Apply transforms to a batch of sharp/blur pairs.
@@ -58,36 +153,63 @@ def transform(example):
     This fn is vectorized
 
     Args:
-        example (tf.Tensor): fully parsed, decoded and loaded sharp/blur pair
+        example (tf.Tensor): batch of sharp/blur pairs, shape [batch, 2, h, w, 3]
 
     Returns:
         batch of transformed sharp/blur pairs tensor(Rank 5)
 
     """
-    # Swaps batch dimension to be second, this make calcs easier in the future
-    sharp, blur = tf.unstack(example, axis=1)
-    images = tf.concat([sharp, blur], axis=0)
+    # Normalize to [-1, 1), same as (images - 127) / 128
+    example = tf.cast(example, dtype=tf.float32)
+    example = example * (1.0 / 128.0) + (-127.0 / 128.0)
 
-    # Generates a random crop size
-    crop_size = int(os.environ.get('IMAGE_SIZE'))
-    batch_size = tf.shape(images)[0]
+    return example
 
-    # Cropping
-    images = tf.image.random_crop(
-        images,
-        size=[batch_size, crop_size, crop_size, 3],
-    )
 
-    images = tf.cast(images, dtype=tf.float32)
-    images = (images - 127.0) / 128.0
+def get_decode_ratio(tfrecs, crop_size):
+    """
+    Compute the largest jpeg decode downscale that still fits the crop.
+
+    The source size is the smallest side over all the stored images,
+    this reads every record once, so it costs a full pass over the data
 
-    sharp, blur = tf.split(images, num_or_size_splits=2)
-    example = tf.stack([sharp, blur], axis=1)
+    Args:
+        tfrecs (list): tfrecords paths
+        crop_size (int): height and width of the cropped images
 
-    return example
+    Returns:
+        jpeg decode ratio, one of 1, 2, 4 or 8
+    """
+    if (not tfrecs):
+        return 1
+
+    def image_side(record):
+        example = tf.io.parse_single_example(record, FEATURE_PROPERTIES)
+        sides = tf.concat(
+            [
+                tf.io.extract_jpeg_shape(example['sharp'])[:2],
+                tf.io.extract_jpeg_shape(example['blur'])[:2],
+            ],
+            axis=0,
+        )
+
+        return tf.reduce_min(sides)
+
+    # Whole records are read, only the jpeg headers are parsed
+    side = tf.data.TFRecordDataset(tfrecs, num_parallel_reads=AUTOTUNE)
+    side = side.map(image_side, num_parallel_calls=AUTOTUNE)
+    side = int(side.reduce(tf.constant(tf.int32.max), tf.minimum))
 
+    ratio = 1
 
-def get_dataset(path, name, batch_size=8, use_cache=False):
+    for candidate in [2, 4, 8]:
+        if (crop_size <= side // candidate):
+            ratio = candidate
+
+    return ratio
+
+
+def get_dataset(path, name, batch_size=8, use_cache=False, ratio=1):
     """
     Generate an interleaved dataset.
 
@@ -105,42 +227,68 @@ def get_dataset(path, name, batch_size=8, use_cache=False):
         path (str): absolute path to the tfrecords folder
         name (str): suffix name to look for tf records
         batch_size (str): batch size of sub-datasets
-        use_cache (bool): Register transformations on cache file
+        use_cache (bool): Register decoded images on cache file
+        ratio (int): jpeg decode downscale, None computes it from the images
 
     Returns:
         interleaved dataset composed of all the matching tfrecords
 
     """
+    # Crop size is fixed for the whole pipeline
+    crop_size = int(os.environ.get('IMAGE_SIZE'))
+
     # Find all the relevant tfrecord following the name suffix
     tfrecs = glob.glob(
         '{path}*.tfrecords'.format(path=os.path.join(path, name)),
     )
 
-    # Creates a dataset listing out tfrecord files
-    dataset = tf.data.Dataset.from_tensor_slices(tfrecs)
+    # Opt-in, decode downscaled images when every source is at least twice the crop
+    if (ratio is None):
+        ratio = get_decode_ratio(tfrecs, crop_size)
 
     # Interleave the tfrecord files contents into a single fast dataset
-    dataset = dataset.interleave(
-        lambda tfrec: tf.data.TFRecordDataset(tfrec),
-        cycle_length=len(tfrecs),
-        block_length=batch_size,
-        num_parallel_calls=len(tfrecs),
+    dataset = tf.data.TFRecordDataset(
+        tfrecs,
+        buffer_size=8 * 1024 * 1024,
+        num_parallel_reads=AUTOTUNE,
     )
 
-    # Parse, batch and transform
-    dataset = dataset.map(parse, num_parallel_calls=AUTOTUNE)
     dataset = dataset.batch(batch_size)
-    dataset = dataset.map(transform)
 
-    # Cache transforms
     if (use_cache):
+        # Cache decoded uint8 images, random crops must stay after this
+        dataset = dataset.map(
+            lambda example: decode(example, ratio),
+            num_parallel_calls=AUTOTUNE,
+        )
         dataset = dataset.cache(
             os.path.join(path, '{name}_cache'.format(name=name)),
         )
+        dataset = dataset.map(
+            lambda example: crop(example, crop_size),
+            num_parallel_calls=AUTOTUNE,
+        )
+    else:
+        # Decode only the random crop window of every pair
+        dataset = dataset.map(
+            lambda example: parse(example, crop_size, ratio),
+            num_parallel_calls=AUTOTUNE,
+        )
+
+    # Normalize
+    dataset = dataset.map(transform, num_parallel_calls=AUTOTUNE)
 
     # Prefetch data
     dataset = dataset.prefetch(AUTOTUNE)
 
+    # Static optimizations, order between examples is not relevant
+    options = tf.data.Options()
+    options.deterministic = False
+    options.experimental_optimization.map_and_batch_fusion = True
+    options.experimental_optimization.map_parallelization = True
+    options.experimental_optimization.parallel_batch = True
+    dataset = dataset.with_options(options)
+
     return dataset
 
 
@@ -154,12 +302,22 @@ def epoch_time(dataset, num_epochs=1):
     tf.print("Execution time for first epoch:", time.perf_counter() - start_time)
 
 
+@tf.function
+def consume(iterator, steps):
+    """Pull steps batches from iterator inside a graph loop."""
+    for _ in tf.range(steps):
+        next(iterator)
+
+
 def n_batch_time(ds, steps=1000, batch_size=8):
     """Benchmark function."""
-    start = time.time()
     it = iter(ds)
-    for i in range(steps):
-        batch = next(it)
+
+    # Warm up, traces consume and fills the prefetch buffer
+    consume(it, tf.constant(1))
+
+    start = time.time()
+    consume(it, tf.constant(steps))
     end = time.time()
 
     duration = end-start
@@ -12,7 +12,7 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 import tensorflow as tf
-from tensorflow.keras.mixed_precision import experimental as mixed_precision
+from tensorflow.keras import mixed_precision
 
 from deblurrer.scripts.datasets.generate_dataset import get_dataset
 from deblurrer.model.callbacks import SaveImageToDisk
@@ -60,13 +60,14 @@ def run(
         batch_size=int(os.environ.get('BATCH_SIZE')),
     )
 
-    # Setup float16 mixed precision
-    if (int(os.environ.get('USE_MIXED_PRECISION'))):
-        policy = mixed_precision.Policy('mixed_float16')
-        mixed_precision.set_policy(policy)
-
     # If in colba tpu instance, use tpus, gpus otherwise
     colab_tpu = os.environ.get('COLAB_TPU_ADDR') is not None
+
+    # Setup mixed precision, tpus only support bfloat16
+    if (int(os.environ.get('USE_MIXED_PRECISION'))):
+        policy = mixed_precision.Policy('mixed_bfloat16' if colab_tpu else 'mixed_float16')
+        mixed_precision.set_global_policy(policy)
+
     if (colab_tpu and (strategy is None)):
         resolver = tf.distribute.cluster_resolver.TPUClusterResolver(
             tpu='grpc://' + os.environ.get('COLAB_TPU_ADDR'),
@@ -89,6 +90,7 @@ def run(
                 channels=int(os.environ.get('FPN_CHANNELS')),
                 filters=int(os.environ.get('DISC_FILTERS')),
                 conv_count=int(os.environ.get('DISC_CONV_COUNT')),
+                image_size=int(os.environ.get('IMAGE_SIZE')),
             )
         if (gen_optimizer is None):
             gen_optimizer = tf.keras.optimizers.Adam(float(os.environ.get('GEN_LR')))
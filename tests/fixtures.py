@@ -6,6 +6,8 @@
 import pytest
 import tensorflow as tf
 
+from deblurrer.scripts.datasets.generate_tfrecord import image_example
+
 @pytest.fixture()
 def dataset():
     """
@@ -36,3 +38,28 @@ def loss_network():
         inputs=vgg19.inputs,
         outputs=vgg19.get_layer(name='block3_conv3').output,
     )
+
+
+@pytest.fixture()
+def tfrecords(tmp_path):
+    """
+    Mock tfrecords folder with a 'train' split.
+
+    Every example stores the same jpeg as sharp and blur
+    Examples differ between them on the blue channel
+
+    Returns:
+        path of the folder containing the tfrecords
+    """
+    # Gradient image, any misaligned crop window changes the values
+    rows = tf.tile(tf.reshape(tf.range(64) * 4, [64, 1, 1]), [1, 64, 1])
+    cols = tf.tile(tf.reshape(tf.range(64) * 4, [1, 64, 1]), [64, 1, 1])
+
+    with tf.io.TFRecordWriter(str(tmp_path / 'train_0.tfrecords')) as writer:
+        for index in range(6):
+            image = tf.concat([rows, cols, tf.fill([64, 64, 1], index * 40)], axis=-1)
+            image = tf.io.encode_jpeg(tf.cast(image, tf.uint8)).numpy()
+
+            writer.write(image_example(image, image).SerializeToString())
+
+    return str(tmp_path)
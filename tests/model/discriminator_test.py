@@ -5,7 +5,7 @@
 
 import tensorflow as tf
 
-from deblurrer.model.discriminator import LocalDiscriminator, GlobalDiscriminator, LeakyConvBlock, DoubleScaleDiscriminator
+from deblurrer.model.discriminator import LocalDiscriminator, GlobalDiscriminator, LeakyConvBlock, DoubleScaleDiscriminator, DiscPred
 
 
 def test_local_discriminator():
@@ -73,7 +73,6 @@ def test_double_scale_discriminator():
     outputs = discrim([inputs, inputs])
 
     # Check shape
-    assert outputs.get('local') is not None
-    assert outputs.get('global') is not None
-    assert outputs.get('local').shape == [4, 1]
-    assert outputs.get('global').shape == [4, 1]
+    assert isinstance(outputs, DiscPred)
+    assert outputs.local.shape == [4, 1]
+    assert outputs.global_.shape == [4, 1]
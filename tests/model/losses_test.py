@@ -10,6 +10,7 @@ from deblurrer.model.losses import ragan_ls_loss
 from deblurrer.model.losses import discriminator_loss
 from deblurrer.model.losses import generator_loss
 from deblurrer.model.losses import feature_reconstruction_loss
+from deblurrer.model.discriminator import DiscPred
 from tests.fixtures import loss_network
 
 
@@ -23,10 +24,10 @@ def test_ragan_ls_loss():
 
 
 def test_discriminator_loss():
-    pred = {
-        'local': tf.constant([[0.75, 0.5, 0.95]]),
-        'global': tf.constant([[0.75, 0.5, 0.95]]),
-    }
+    pred = DiscPred(
+        local=tf.constant([[0.75, 0.5, 0.95]]),
+        global_=tf.constant([[0.75, 0.5, 0.95]]),
+    )
 
     loss = discriminator_loss(pred, True)
 
@@ -35,10 +36,10 @@ def test_discriminator_loss():
 
 
 def test_generator_loss(loss_network):
-    fake_pred = {
-        'local': tf.constant([[0.15, 0.45, 0.25]]),
-        'global': tf.constant([[0.75, 0.5, 0.95]]),
-    }
+    fake_pred = DiscPred(
+        local=tf.constant([[0.15, 0.45, 0.25]]),
+        global_=tf.constant([[0.75, 0.5, 0.95]]),
+    )
 
     # Fake image, will be generated and sharp image
     gen_input = tf.random.uniform([4, 32, 32, 3], seed=1)
@@ -50,6 +51,33 @@ def test_generator_loss(loss_network):
     #assert tf.cast(loss, dtype=tf.float16) == 0.08987017
 
 
+def test_generator_loss_mixed_precision():
+    policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy('mixed_float16')
+
+    try:
+        # Small float16 network, stands for the mixed precision loss network
+        loss_network = tf.keras.Sequential([
+            tf.keras.layers.Conv2D(8, 3, input_shape=(None, None, 3)),
+        ])
+
+        fake_pred = DiscPred(
+            local=tf.constant([[0.15], [0.45]], dtype=tf.float16),
+            global_=tf.constant([[0.75], [0.5]], dtype=tf.float16),
+        )
+
+        # Generator outputs are float16 under mixed precision
+        gen_input = tf.random.uniform([2, 32, 32, 3], seed=1, dtype=tf.float16)
+        sharp_input = tf.random.uniform([2, 32, 32, 3], seed=2)
+
+        loss = generator_loss(gen_input, sharp_input, fake_pred, loss_network)
+    finally:
+        tf.keras.mixed_precision.set_global_policy(policy)
+
+    assert loss.shape == []
+    assert loss.dtype == tf.float32
+
+
 def test_feature_reconstruction_loss(loss_network):
     # Fake image, will be generated and sharp image
     gen_input = tf.random.uniform([4, 32, 32, 3], seed=1)
@@ -59,3 +87,41 @@ def test_feature_reconstruction_loss(loss_network):
 
     assert loss.shape == []
     assert tf.cast(loss, dtype=tf.float16) == 0.0011661573
+
+
+def test_feature_reconstruction_loss_gradient(loss_network):
+    # Fake image, will be generated and sharp image
+    gen_input = tf.random.uniform([4, 32, 32, 3], seed=1)
+    sharp_input = tf.random.uniform([4, 32, 32, 3], seed=2)
+
+    with tf.GradientTape() as tape:
+        tape.watch(gen_input)
+        loss = feature_reconstruction_loss(gen_input, sharp_input, loss_network)
+
+    gradient = tape.gradient(loss, gen_input)
+
+    # Perceptual term must reach the generated images
+    assert gradient is not None
+    assert bool(tf.reduce_any(gradient != 0.0))
+
+
+def test_feature_reconstruction_loss_inference_fn():
+    # Small network, precompiled as DeblurGAN does with the loss network
+    network = tf.keras.Sequential([
+        tf.keras.layers.Conv2D(8, 3, input_shape=(None, None, 3)),
+    ])
+    inference_fn = tf.function(
+        lambda images: network(images, training=False),
+        input_signature=[tf.TensorSpec([None, 32, 32, 3], tf.float32)],
+    )
+
+    # Fake image, will be generated and sharp image
+    gen_input = tf.random.uniform([4, 32, 32, 3], seed=1)
+    sharp_input = tf.random.uniform([4, 32, 32, 3], seed=2)
+
+    loss = feature_reconstruction_loss(gen_input, sharp_input, inference_fn)
+
+    # Same loss as calling the model itself
+    assert loss.shape == []
+    expected = feature_reconstruction_loss(gen_input, sharp_input, network)
+    assert abs(float(loss - expected)) < 1e-6
@@ -0,0 +1,206 @@
+#!/usr/bin/python
+# coding=utf-8
+
+"""Test suit for the dataset download script."""
+
+import io
+import os
+import zipfile
+
+import pytest
+import requests
+import stream_unzip
+
+from deblurrer.scripts.datasets import download
+
+
+class FakeResponse(object):
+    """Minimal streamed requests.Response."""
+
+    def __init__(self, data=b'', status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+    def iter_content(self, block_size):
+        for start in range(0, len(self.data), block_size):
+            yield self.data[start:start + block_size]
+
+    def raise_for_status(self):
+        if (not self.ok):
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+
+def serve(monkeypatch, data, accept_ranges='bytes', honor_ranges=True, missing=0):
+    """
+    Patch requests to serve data from memory.
+
+    Args:
+        data (bytes): served file
+        accept_ranges (str): Accept-Ranges header of the HEAD response
+        honor_ranges (bool): answer range requests with 206 partial content
+        missing (int): bytes dropped from the end of full responses
+
+    Returns:
+        list where every requested range header is recorded
+    """
+    ranges = []
+    served_headers = {'content-length': str(len(data)), 'accept-ranges': accept_ranges}
+
+    def head(url, **kwargs):
+        return FakeResponse(headers=served_headers)
+
+    def get(url, headers=None, stream=False):
+        if (headers and 'Range' in headers):
+            ranges.append(headers['Range'])
+
+            if (honor_ranges):
+                start, end = headers['Range'][len('bytes='):].split('-')
+                return FakeResponse(data[int(start):int(end) + 1], 206)
+
+        return FakeResponse(data[:len(data) - missing], 200, dict(served_headers))
+
+    monkeypatch.setattr(download.requests, 'head', head)
+    monkeypatch.setattr(download.requests, 'get', get)
+
+    return ranges
+
+
+def make_zip(members):
+    """Zip the supplied {name: bytes} members in memory."""
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as compressed:
+        for name, data in members.items():
+            compressed.writestr(name, data)
+
+    return buffer.getvalue()
+
+
+def test_extract(tmp_path):
+    members = {
+        'blur/{index}.jpg'.format(index=index): os.urandom(1024)
+        for index in range(20)
+    }
+    members['sharp/0.jpg'] = b'sharp'
+
+    zip_path = tmp_path / 'blur.zip'
+    zip_path.write_bytes(make_zip(dict(members, **{'../evil.jpg': b'evil'})))
+
+    extract_path = tmp_path / 'dataset'
+    extract_path.mkdir()
+
+    assert download.extract(str(zip_path), str(extract_path))
+
+    # Every member extracted, parent relative members skipped
+    for name, data in members.items():
+        assert (extract_path / name).read_bytes() == data
+    assert not (tmp_path / 'evil.jpg').exists()
+
+
+def test_extract_missing_file(tmp_path):
+    assert not download.extract(str(tmp_path / 'missing.zip'), str(tmp_path))
+
+
+def test_download_ranges(tmp_path, monkeypatch):
+    data = os.urandom(100003)
+    ranges = serve(monkeypatch, data)
+
+    download_path = tmp_path / 'blur.zip'
+
+    assert download.download('http://test', str(download_path))
+    assert download_path.read_bytes() == data
+
+    # Fetched as 8 parallel parts
+    assert len(ranges) == 8
+
+
+def test_download_single_stream(tmp_path, monkeypatch):
+    data = os.urandom(100003)
+    ranges = serve(monkeypatch, data, accept_ranges='none')
+
+    download_path = tmp_path / 'blur.zip'
+
+    assert download.download('http://test', str(download_path))
+    assert download_path.read_bytes() == data
+    assert not ranges
+
+
+def test_download_ignored_range(tmp_path, monkeypatch):
+    serve(monkeypatch, os.urandom(100003), honor_ranges=False)
+
+    download_path = tmp_path / 'blur.zip'
+
+    with pytest.raises(requests.HTTPError):
+        download.download('http://test', str(download_path))
+
+    # No partial file is left behind
+    assert not download_path.exists()
+
+
+def test_download_short_transfer(tmp_path, monkeypatch):
+    serve(monkeypatch, os.urandom(100003), accept_ranges='none', missing=10)
+
+    download_path = tmp_path / 'blur.zip'
+
+    assert not download.download('http://test', str(download_path))
+    assert not download_path.exists()
+
+
+def test_download_and_extract_ranges(tmp_path, monkeypatch):
+    members = {'blur/{0}.jpg'.format(i): os.urandom(4096) for i in range(10)}
+    ranges = serve(monkeypatch, make_zip(members))
+
+    assert download.download_and_extract('http://fake/data.zip', str(tmp_path))
+    assert len(ranges) == 8
+
+    # Temporary zip is removed, only members are left
+    assert os.listdir(tmp_path) == ['blur']
+    for name, data in members.items():
+        assert (tmp_path / name).read_bytes() == data
+
+
+def test_download_and_extract_stream(tmp_path, monkeypatch):
+    members = {'blur/{0}.jpg'.format(i): os.urandom(4096) for i in range(10)}
+    members['../evil.jpg'] = b'evil'
+    ranges = serve(monkeypatch, make_zip(members), accept_ranges='none')
+
+    assert download.download_and_extract('http://fake/data.zip', str(tmp_path))
+    assert ranges == []
+
+    assert os.listdir(tmp_path) == ['blur']
+    assert not (tmp_path.parent / 'evil.jpg').exists()
+    for name, data in members.items():
+        if (name.startswith('blur')):
+            assert (tmp_path / name).read_bytes() == data
+
+
+def test_download_and_extract_short_stream(tmp_path, monkeypatch):
+    members = {'blur/{0}.jpg'.format(i): os.urandom(4096) for i in range(10)}
+    serve(monkeypatch, make_zip(members), accept_ranges='none', missing=4096)
+
+    with pytest.raises(stream_unzip.TruncatedDataError):
+        download.download_and_extract('http://fake/data.zip', str(tmp_path))
+
+    # Partly extracted members are not left behind
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_and_extract_short_tail(tmp_path, monkeypatch):
+    members = {'blur/{0}.jpg'.format(i): os.urandom(4096) for i in range(10)}
+
+    # Only the end of central directory is lost, all members get extracted
+    serve(monkeypatch, make_zip(members), accept_ranges='none', missing=10)
+
+    assert not download.download_and_extract('http://fake/data.zip', str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_and_extract_cp437_name(tmp_path, monkeypatch):
+    # Rename a member to a cp437 name without the utf-8 flag
+    data = make_zip({'x.jpg': b'data'}).replace(b'x.jpg', b'\x82.jpg')
+    serve(monkeypatch, data, accept_ranges='none')
+
+    assert download.download_and_extract('http://fake/data.zip', str(tmp_path))
+    assert (tmp_path / 'é.jpg').read_bytes() == b'data'
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# coding=utf-8
+
+"""Test suit for the tfrecords dataset pipeline."""
+
+import glob
+import os
+
+import pytest
+import tensorflow as tf
+
+from deblurrer.scripts.datasets.generate_dataset import (
+    get_dataset,
+    get_decode_ratio,
+    parse,
+)
+from tests.fixtures import tfrecords
+
+
+def test_parse(tfrecords):
+    # Batch of serialized examples
+    records = tf.data.TFRecordDataset(
+        glob.glob(os.path.join(tfrecords, '*.tfrecords')),
+    ).batch(6)
+
+    for batch in records.take(1):
+        example = parse(batch, crop_size=32)
+
+    # Check shape and pairs alignment
+    assert example.shape == [6, 2, 32, 32, 3]
+    assert example.dtype == tf.uint8
+    assert bool(tf.reduce_all(example[:, 0] == example[:, 1]))
+
+
+@pytest.mark.parametrize('use_cache', [False, True])
+def test_get_dataset(tfrecords, monkeypatch, use_cache):
+    monkeypatch.setenv('IMAGE_SIZE', '32')
+
+    dataset = get_dataset(tfrecords, 'train', batch_size=4, use_cache=use_cache)
+
+    batches = list(dataset)
+
+    # 6 examples on batches of 4
+    assert sorted(batch.shape[0] for batch in batches) == [2, 4]
+
+    for batch in batches:
+        # Check shape, range and pairs alignment
+        assert batch.shape[1:] == [2, 32, 32, 3]
+        assert batch.dtype == tf.float32
+        assert bool(tf.reduce_all(batch >= -1.0))
+        assert bool(tf.reduce_all(batch <= 1.0))
+        assert bool(tf.reduce_all(batch[:, 0] == batch[:, 1]))
+
+
+def test_get_decode_ratio(tfrecords):
+    tfrecs = glob.glob(os.path.join(tfrecords, '*.tfrecords'))
+
+    # 64px images, largest downscale fitting the crop
+    assert get_decode_ratio(tfrecs, 32) == 2
+    assert get_decode_ratio(tfrecs, 64) == 1
+    assert get_decode_ratio(tfrecs, 8) == 8
+    assert get_decode_ratio([], 32) == 1
+
+
+@pytest.mark.parametrize('use_cache', [False, True])
+def test_get_dataset_decode_ratio(tfrecords, monkeypatch, use_cache):
+    monkeypatch.setenv('IMAGE_SIZE', '32')
+
+    # Ratio computed from the images, 2 for 64px images and 32px crops
+    dataset = get_dataset(
+        tfrecords,
+        'train',
+        batch_size=4,
+        use_cache=use_cache,
+        ratio=None,
+    )
+
+    for batch in dataset:
+        # Check shape and pairs alignment
+        assert batch.shape[1:] == [2, 32, 32, 3]
+        assert bool(tf.reduce_all(batch[:, 0] == batch[:, 1]))